@@ -2,19 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import mmap
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Sequence, Tuple
 
 from dotenv import load_dotenv
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import (InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, Message,
+                      Update)
 from telegram.constants import ParseMode
 from telegram.ext import (Application, CallbackQueryHandler, CommandHandler,
                           ContextTypes)
-from telegram.error import TelegramError
+from telegram.error import BadRequest, TelegramError
+
+try:  # orjson заметно быстрее стандартного парсера, но остаётся необязательным
+    from orjson import loads as load_json
+except ImportError:  # pragma: no cover - зависит от окружения
+
+    def load_json(data: memoryview) -> Any:
+        """Разбирает JSON стандартным модулем, который не принимает memoryview."""
+
+        return json.loads(bytes(data))
+
+try:  # uvloop ускоряет цикл событий, но недоступен, например, в Windows
+    import uvloop
+except ImportError:  # pragma: no cover - зависит от окружения
+    uvloop = None
 
 # Включаем логирование для удобной отладки и мониторинга
 logging.basicConfig(
@@ -23,8 +40,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Префиксы callback_data, по которым различаются нажатия на кнопки
+MENU_PREFIX = "menu:"
+ATTRACTION_PREFIX = "attraction:"
+_MENU_PREFIX_LEN = len(MENU_PREFIX)
+_ATTRACTION_PREFIX_LEN = len(ATTRACTION_PREFIX)
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Attraction:
     """Структура данных, описывающая достопримечательность."""
 
@@ -35,31 +58,57 @@ class Attraction:
     latitude: float
     longitude: float
     image_url: str
-
-    @property
-    def map_link(self) -> str:
-        """Ссылка на карту с точкой достопримечательности."""
-
-        return (
-            "https://yandex.ru/maps/?" f"pt={self.longitude},{self.latitude}&z=16&l=map"
+    # Ссылки зависят только от координат, поэтому вычисляются один раз
+    map_link: str = field(init=False, repr=False, compare=False)
+    route_link: str = field(init=False, repr=False, compare=False)
+    # Текст карточки тоже неизменен и собирается при загрузке
+    html_body: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "map_link",
+            "https://yandex.ru/maps/?" f"pt={self.longitude},{self.latitude}&z=16&l=map",
         )
-
-    @property
-    def route_link(self) -> str:
-        """Ссылка на построение маршрута до точки."""
-
-        return (
+        object.__setattr__(
+            self,
+            "route_link",
             "https://yandex.ru/maps/?"
-            f"rtext=~{self.latitude}%2C{self.longitude}&rtt=auto"
+            f"rtext=~{self.latitude}%2C{self.longitude}&rtt=auto",
+        )
+        object.__setattr__(
+            self,
+            "html_body",
+            f"<b>{self.name}</b>\n"
+            f"Адрес: {self.address}\n"
+            "\n"
+            f"{self.description}\n"
+            "\n"
+            "Выберите действие на кнопках ниже:",
         )
 
 
 class AttractionStorage:
     """Хранилище данных о достопримечательностях."""
 
-    def __init__(self, items: List[Attraction]) -> None:
+    def __init__(self, items: List[Attraction], file_ids_path: Path | None = None) -> None:
         # Сохраняем элементы в словарь для быстрого доступа по идентификатору
         self._items: Dict[str, Attraction] = {item.identifier: item for item in items}
+        # Неизменяемое представление отдаётся всем вызывающим без копирования
+        self._items_tuple: Tuple[Attraction, ...] = tuple(self._items.values())
+        # Для списка нужны только названия и идентификаторы, храним их отдельно
+        self._names: Tuple[str, ...] = tuple(item.name for item in self._items_tuple)
+        self._ids: Tuple[str, ...] = tuple(item.identifier for item in self._items_tuple)
+        # Список не меняется после загрузки, поэтому клавиатуру строим один раз
+        self.attractions_keyboard: InlineKeyboardMarkup = build_attractions_keyboard(
+            self._names, self._ids
+        )
+        self._detail_keyboards: Dict[str, InlineKeyboardMarkup] = {
+            item.identifier: build_attraction_keyboard(item) for item in self._items_tuple
+        }
+        # Идентификаторы загруженных в Telegram фотографий, чтобы не передавать URL повторно
+        self._file_ids_path = file_ids_path
+        self._file_ids: Dict[str, str] = self._load_file_ids()
 
     @classmethod
     def from_json(cls, path: Path) -> "AttractionStorage":
@@ -68,8 +117,10 @@ class AttractionStorage:
         if not path.exists():
             raise FileNotFoundError(f"Файл с достопримечательностями не найден: {path}")
 
-        with path.open("r", encoding="utf-8") as fh:
-            payload = json.load(fh)
+        # Отображаем файл в память и передаём буфер парсеру без промежуточных копий
+        with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as buffer:
+                payload = load_json(buffer)
 
         attractions = [
             Attraction(
@@ -83,18 +134,83 @@ class AttractionStorage:
             )
             for item in payload
         ]
-        return cls(attractions)
+        return cls(attractions, file_ids_path=path.with_name(f"{path.stem}.file_ids.json"))
 
-    def all(self) -> List[Attraction]:
-        """Возвращает список всех достопримечательностей."""
+    def all(self) -> Sequence[Attraction]:
+        """Возвращает все достопримечательности в порядке загрузки."""
 
-        return list(self._items.values())
+        return self._items_tuple
 
     def get(self, identifier: str) -> Attraction | None:
         """Возвращает конкретную достопримечательность по идентификатору."""
 
         return self._items.get(identifier)
 
+    def detail_keyboard(self, identifier: str) -> InlineKeyboardMarkup:
+        """Возвращает заранее собранную клавиатуру карточки достопримечательности."""
+
+        return self._detail_keyboards[identifier]
+
+    def file_id(self, identifier: str) -> str | None:
+        """Возвращает file_id фотографии, если она уже загружалась в Telegram."""
+
+        return self._file_ids.get(identifier)
+
+    def set_file_id(self, identifier: str, file_id: str | None) -> None:
+        """Запоминает file_id фотографии (или забывает его) и сохраняет соответствие на диск."""
+
+        if self._file_ids.get(identifier) == file_id:
+            return
+        if file_id is None:
+            del self._file_ids[identifier]
+        else:
+            self._file_ids[identifier] = file_id
+        # Файл крошечный и меняется не чаще раза на фотографию, поэтому пишем его синхронно
+        self._save_file_ids()
+
+    def _load_file_ids(self) -> Dict[str, str]:
+        """Читает сохранённые file_id фотографий, если файл уже существует."""
+
+        if self._file_ids_path is None or not self._file_ids_path.exists():
+            return {}
+
+        try:
+            payload = load_json(self._file_ids_path.read_bytes())
+        except (OSError, ValueError) as exc:
+            logger.warning("Не удалось прочитать сохранённые file_id фотографий: %s", exc)
+            return {}
+
+        if not isinstance(payload, dict):
+            logger.warning("Файл с file_id фотографий имеет неверный формат, он будет перезаписан")
+            return {}
+        return {
+            key: value
+            for key, value in payload.items()
+            if key in self._items and isinstance(value, str)
+        }
+
+    def _save_file_ids(self) -> None:
+        """Атомарно записывает file_id фотографий рядом с файлом данных."""
+
+        if self._file_ids_path is None:
+            return
+
+        tmp_path = self._file_ids_path.with_name(f"{self._file_ids_path.name}.tmp")
+        try:
+            tmp_path.write_text(
+                json.dumps(self._file_ids, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            tmp_path.replace(self._file_ids_path)
+        except OSError as exc:
+            logger.warning("Не удалось сохранить file_id фотографий: %s", exc)
+
+
+# Кнопки возврата одинаковы для всех клавиатур, поэтому создаются один раз
+_BACK_TO_MENU_ROW = (InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="menu:main"),)
+_BACK_TO_LIST_ROW = (
+    InlineKeyboardButton(text="⬅️ Назад к списку", callback_data="menu:attractions"),
+)
+
 
 def build_main_menu_keyboard() -> InlineKeyboardMarkup:
     """Создаёт клавиатуру главного меню."""
@@ -107,17 +223,35 @@ def build_main_menu_keyboard() -> InlineKeyboardMarkup:
     )
 
 
-def build_attractions_keyboard(attractions: List[Attraction]) -> InlineKeyboardMarkup:
+def build_attractions_keyboard(
+    names: Sequence[str], identifiers: Sequence[str]
+) -> InlineKeyboardMarkup:
     """Создаёт клавиатуру со списком достопримечательностей."""
 
     buttons = [
-        [InlineKeyboardButton(text=item.name, callback_data=f"attraction:{item.identifier}")]
-        for item in attractions
+        [InlineKeyboardButton(text=name, callback_data=f"{ATTRACTION_PREFIX}{identifier}")]
+        for name, identifier in zip(names, identifiers)
     ]
-    buttons.append([InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="menu:main")])
+    buttons.append(_BACK_TO_MENU_ROW)
     return InlineKeyboardMarkup(buttons)
 
 
+def build_attraction_keyboard(attraction: Attraction) -> InlineKeyboardMarkup:
+    """Создаёт клавиатуру карточки достопримечательности."""
+
+    return InlineKeyboardMarkup(
+        [
+            [InlineKeyboardButton(text="🗺 Открыть на карте", url=attraction.map_link)],
+            [InlineKeyboardButton(text="🚗 Маршрут на Яндекс.Картах", url=attraction.route_link)],
+            _BACK_TO_LIST_ROW,
+        ]
+    )
+
+
+# Главное меню не зависит от данных, поэтому создаётся один раз при импорте
+MAIN_MENU_KEYBOARD = build_main_menu_keyboard()
+
+
 async def delete_previous_photo(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
     """Удаляет ранее отправленную фотографию, если она ещё есть в чате."""
 
@@ -131,12 +265,79 @@ async def delete_previous_photo(context: ContextTypes.DEFAULT_TYPE, chat_id: int
         logger.debug("Не удалось удалить старую фотографию: %s", exc)
 
 
+def remember_photo_file_id(
+    storage: AttractionStorage, attraction: Attraction, message: Message
+) -> None:
+    """Сохраняет file_id фотографии из отправленного сообщения."""
+
+    if message.photo:
+        # Последний элемент — фотография в наибольшем разрешении
+        storage.set_file_id(attraction.identifier, message.photo[-1].file_id)
+
+
+async def send_attraction_photo(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, attraction: Attraction
+) -> None:
+    """Заменяет ранее отправленную фотографию снимком выбранной достопримечательности."""
+
+    storage: AttractionStorage = context.application.bot_data["storage"]
+    file_id = storage.file_id(attraction.identifier)
+
+    # Если фотография уже есть в чате, меняем её на месте одним запросом
+    previous_message_id = context.user_data.get("photo_message_id")
+    if previous_message_id:
+        try:
+            edited = await context.bot.edit_message_media(
+                chat_id=chat_id,
+                message_id=previous_message_id,
+                media=InputMediaPhoto(
+                    media=file_id or attraction.image_url,
+                    caption=attraction.name,
+                    parse_mode=ParseMode.HTML,
+                ),
+            )
+        except BadRequest as exc:
+            if "not modified" in exc.message.lower():
+                # В чате уже показана фотография этой достопримечательности
+                return
+            logger.debug("Не удалось заменить фотографию, отправляем новую: %s", exc)
+        except TelegramError as exc:  # pragma: no cover - зависит от взаимодействия с API
+            logger.debug("Не удалось заменить фотографию, отправляем новую: %s", exc)
+        else:
+            if isinstance(edited, Message):
+                remember_photo_file_id(storage, attraction, edited)
+            return
+
+    await delete_previous_photo(context, chat_id)
+    try:
+        photo_message = await context.bot.send_photo(
+            chat_id=chat_id,
+            photo=file_id or attraction.image_url,
+            caption=attraction.name,
+            parse_mode=ParseMode.HTML,
+        )
+    except BadRequest as exc:
+        if file_id is None:
+            raise
+        # Сохранённый file_id мог устареть, например после смены токена бота
+        logger.warning("Telegram отклонил сохранённый file_id фотографии: %s", exc)
+        storage.set_file_id(attraction.identifier, None)
+        photo_message = await context.bot.send_photo(
+            chat_id=chat_id,
+            photo=attraction.image_url,
+            caption=attraction.name,
+            parse_mode=ParseMode.HTML,
+        )
+    context.user_data["photo_message_id"] = photo_message.message_id
+    remember_photo_file_id(storage, attraction, photo_message)
+
+
 async def send_main_menu(
     update: Update, context: ContextTypes.DEFAULT_TYPE, *, via_callback: bool = False
 ) -> None:
     """Отображает главное меню с кнопками навигации."""
 
-    keyboard = build_main_menu_keyboard()
+    keyboard = MAIN_MENU_KEYBOARD
     text = (
         "Здравствуйте, {name}! Я виртуальный гид проекта «Цифровой Торжокъ».\n"
         "С моей помощью вы узнаете историю главных достопримечательностей и сразу получите ссылки на карты.\n"
@@ -174,7 +375,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         chat = update.effective_chat
         if chat is not None:
             await delete_previous_photo(context, chat.id)
-        await update.message.reply_text(help_text, reply_markup=build_main_menu_keyboard())
+        await update.message.reply_text(help_text, reply_markup=MAIN_MENU_KEYBOARD)
 
 
 async def show_attractions(
@@ -183,9 +384,7 @@ async def show_attractions(
     """Отправляет пользователю список доступных достопримечательностей."""
 
     storage: AttractionStorage = context.application.bot_data["storage"]
-    attractions = storage.all()
-
-    if not attractions:
+    if not storage.all():
         if update.callback_query and update.callback_query.message:
             await update.callback_query.edit_message_text(
                 "Извините, список достопримечательностей пока пуст. Попробуйте позже."
@@ -196,17 +395,18 @@ async def show_attractions(
             )
         return
 
-    reply_markup = build_attractions_keyboard(attractions)
+    reply_markup = storage.attractions_keyboard
     text = "Выберите достопримечательность, чтобы узнать подробности и увидеть фотографию:"
 
-    chat = update.effective_chat
-    if chat is not None:
-        await delete_previous_photo(context, chat.id)
-
     if update.callback_query and update.callback_query.message:
+        # Фотографию при возврате к списку не удаляем: следующая карточка заменит её на месте
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
         return
 
+    chat = update.effective_chat
+    if chat is not None:
+        await delete_previous_photo(context, chat.id)
+
     if update.message:
         await update.message.reply_text(text, reply_markup=reply_markup)
 
@@ -221,7 +421,7 @@ async def attraction_details(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     await query.answer()
 
-    _, _, identifier = query.data.partition(":")
+    identifier = query.data[_ATTRACTION_PREFIX_LEN:]
     storage: AttractionStorage = context.application.bot_data["storage"]
     attraction = storage.get(identifier)
 
@@ -231,40 +431,20 @@ async def attraction_details(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
 
-    message_lines = [
-        f"<b>{attraction.name}</b>",
-        f"Адрес: {attraction.address}",
-        "",
-        attraction.description,
-        "",
-        "Выберите действие на кнопках ниже:",
-    ]
-
-    keyboard = InlineKeyboardMarkup(
-        [
-            [InlineKeyboardButton(text="🗺 Открыть на карте", url=attraction.map_link)],
-            [InlineKeyboardButton(text="🚗 Маршрут на Яндекс.Картах", url=attraction.route_link)],
-            [InlineKeyboardButton(text="⬅️ Назад к списку", callback_data="menu:attractions")],
-        ]
-    )
-
-    await query.edit_message_text(
-        "\n".join(message_lines),
+    edit_text = query.edit_message_text(
+        attraction.html_body,
         parse_mode=ParseMode.HTML,
-        reply_markup=keyboard,
+        reply_markup=storage.detail_keyboard(attraction.identifier),
         disable_web_page_preview=True,
     )
 
     if query.message and query.message.chat:
-        chat_id = query.message.chat.id
-        await delete_previous_photo(context, chat_id)
-        photo_message = await context.bot.send_photo(
-            chat_id=chat_id,
-            photo=attraction.image_url,
-            caption=attraction.name,
-            parse_mode=ParseMode.HTML,
+        # Текст и фотография не зависят друг от друга, поэтому запросы идут параллельно
+        await asyncio.gather(
+            edit_text, send_attraction_photo(context, query.message.chat.id, attraction)
         )
-        context.user_data["photo_message_id"] = photo_message.message_id
+    else:
+        await edit_text
 
 
 async def log_application_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -288,7 +468,7 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
 
     await query.answer()
-    _, _, action = query.data.partition(":")
+    action = query.data[_MENU_PREFIX_LEN:]
 
     if action == "main":
         if query.message and query.message.chat:
@@ -304,7 +484,30 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             "В разделе «Достопримечательности» можно открыть карту и построить маршрут.\n"
             "Возвращайтесь в меню, чтобы выбрать новый объект или прочитать подсказки ещё раз."
         )
-        await query.edit_message_text(help_text, reply_markup=build_main_menu_keyboard())
+        await query.edit_message_text(help_text, reply_markup=MAIN_MENU_KEYBOARD)
+
+
+# Обработчики нажатий на кнопки по префиксу callback_data
+_CALLBACK_HANDLERS = {
+    MENU_PREFIX: handle_menu,
+    ATTRACTION_PREFIX: attraction_details,
+}
+
+
+async def dispatch_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Передаёт нажатие на кнопку обработчику, соответствующему префиксу данных."""
+
+    query = update.callback_query
+    if query is None or not isinstance(query.data, str):
+        return
+
+    # Префикс включает двоеточие; при его отсутствии срез даёт пустую строку
+    handler = _CALLBACK_HANDLERS.get(query.data[: query.data.find(":") + 1])
+    if handler is None:
+        logger.warning("Получены неизвестные данные кнопки: %s", query.data)
+        return
+
+    await handler(update, context)
 
 
 def build_application(storage: AttractionStorage) -> Application:
@@ -315,7 +518,16 @@ def build_application(storage: AttractionStorage) -> Application:
     if not token:
         raise RuntimeError("Не задан токен бота TELEGRAM_TOKEN в переменных окружения")
 
-    application = Application.builder().token(token).build()
+    # Постоянные HTTP/2-соединения избавляют от повторных TLS-рукопожатий при отправке фото;
+    # размер пула соединений остаётся стандартным для ApplicationBuilder
+    application = (
+        Application.builder()
+        .token(token)
+        .http_version("2")
+        .get_updates_http_version("2")
+        .pool_timeout(5.0)
+        .build()
+    )
 
     # Сохраняем хранилище в bot_data, чтобы иметь к нему доступ в обработчиках
     application.bot_data["storage"] = storage
@@ -323,8 +535,8 @@ def build_application(storage: AttractionStorage) -> Application:
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("attractions", show_attractions))
-    application.add_handler(CallbackQueryHandler(handle_menu, pattern=r"^menu:"))
-    application.add_handler(CallbackQueryHandler(attraction_details, pattern=r"^attraction:"))
+    # Все нажатия на кнопки проходят через один обработчик с таблицей маршрутизации
+    application.add_handler(CallbackQueryHandler(dispatch_callback))
     # Добавляем обработчик для логирования всех необработанных ошибок
     application.add_error_handler(log_application_error)
 
@@ -338,6 +550,22 @@ def main() -> None:
     storage = AttractionStorage.from_json(base_dir / "data" / "attractions.json")
     application = build_application(storage)
 
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    # Если задан внешний адрес, Telegram сам доставляет обновления через webhook
+    webhook_host = os.getenv("WEBHOOK_HOST")
+    if webhook_host:
+        token = application.bot.token
+        logger.info("Запуск бота в режиме webhook...")
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=int(os.getenv("PORT", "8443")),
+            url_path=token,
+            webhook_url=f"https://{webhook_host}/{token}",
+        )
+        return
+
     logger.info("Запуск бота...")
     application.run_polling()
 